@@ -300,10 +300,10 @@ def attempt_unlink(package):
         pass
 
 
-def brew_execute(args, env=None):
+def brew_execute(args, env=None, cwd=None):
     os.environ["HOMEBREW_NO_EMOJI"] = "1"  # simplify brew parsing.
     cmds = ["brew"] + args
-    return execute(cmds, env=env)
+    return execute(cmds, env=env, cwd=cwd)
 
 
 def build_env_statements_from_recipe_context(recipe_context, **kwds):
@@ -410,26 +410,20 @@ def brew_head_at_version(recipe_context, package, version):
 
 @contextlib.contextmanager
 def brew_head_at_commit(commit, tap_path):
+    current_commit = git_execute(["rev-parse", "HEAD"], cwd=tap_path).strip()
     try:
-        os.chdir(tap_path)
-        current_commit = git_execute(["rev-parse", "HEAD"]).strip()
-        try:
-            git_execute(["checkout", commit])
-            yield
-        finally:
-            git_execute(["checkout", current_commit])
+        git_execute(["checkout", commit], cwd=tap_path)
+        yield
     finally:
-        # TODO: restore chdir - or better yet just don't chdir
-        # shouldn't be needed.
-        pass
+        git_execute(["checkout", current_commit], cwd=tap_path)
 
 
-def git_execute(args):
+def git_execute(args, cwd=None):
     cmds = ["git"] + args
-    return execute(cmds)
+    return execute(cmds, cwd=cwd)
 
 
-def execute(cmds, env=None):
+def execute(cmds, env=None, cwd=None):
     subprocess_kwds = dict(
         shell=False,
         stdout=subprocess.PIPE,
@@ -437,6 +431,8 @@ def execute(cmds, env=None):
     )
     if env:
         subprocess_kwds["env"] = env
+    if cwd:
+        subprocess_kwds["cwd"] = cwd
     p = subprocess.Popen(cmds, **subprocess_kwds)
     # log = p.stdout.read()
     global VERBOSE
@@ -489,15 +485,17 @@ def extended_brew_info(recipe):
 def brew_versions_info(package, tap_path):
 
     def versioned(recipe_path):
+        # brew versions is run from the tap, so relative recipe paths are
+        # relative to it.
         if not os.path.isabs(recipe_path):
-            recipe_path = os.path.join(os.getcwd(), recipe_path)
+            recipe_path = os.path.join(tap_path, recipe_path)
         # Dependencies in the same repository should be versioned,
         # core dependencies (presumably in base homebrew) are not
         # versioned.
         return tap_path in recipe_path
 
     # TODO: Also use tags.
-    stdout = brew_execute(["versions", package])
+    stdout = brew_execute(["versions", package], cwd=tap_path)
     version_parts = [l for l in stdout.split("\n") if l and "git checkout" in l]
     version_parts = map(lambda l: WHITESPACE_PATTERN.split(l), version_parts)
     info = [(p[0], p[3], versioned(p[4])) for p in version_parts]
@@ -177,12 +177,14 @@ def unique_id(KEY_SIZE=128):
     return md5(random_bits).hexdigest()
 
 
+class DoctypeSafeCallbackTarget( ElementTree.TreeBuilder ):
+    # handle deprecation warning for XMLParsing a file with DOCTYPE
+    def doctype( *args ):
+        pass
+
+
 def parse_xml( fname ):
     """Returns a parsed xml tree"""
-    # handle deprecation warning for XMLParsing a file with DOCTYPE
-    class DoctypeSafeCallbackTarget( ElementTree.TreeBuilder ):
-        def doctype( *args ):
-            pass
     tree = ElementTree.ElementTree()
     root = tree.parse( fname, parser=ElementTree.XMLParser( target=DoctypeSafeCallbackTarget() ) )
     ElementInclude.include( root )
@@ -1204,19 +1206,19 @@ def size_to_bytes( size ):
         return int( size )
 
 
-def send_mail( frm, to, subject, body, config ):
-    """
-    Sends an email.
-    """
-    to = listify( to )
+def _build_mail_message( frm, to, subject, body ):
     msg = email_mime_text.MIMEText(  body.encode( 'ascii', 'replace' ) )
     msg[ 'To' ] = ', '.join( to )
     msg[ 'From' ] = frm
     msg[ 'Subject' ] = subject
-    if config.smtp_server is None:
-        log.error( "Mail is not configured for this Galaxy instance." )
-        log.info( msg )
-        return
+    return msg
+
+
+def _connect_smtp( config ):
+    """
+    Returns an SMTP connection to the configured server, secured and authenticated
+    according to the config.
+    """
     smtp_ssl = asbool( getattr(config, 'smtp_ssl', False ) )
     if smtp_ssl:
         s = smtplib.SMTP_SSL()
@@ -1250,10 +1252,72 @@ def send_mail( frm, to, subject, body, config ):
             log.error( "No suitable authentication method was found: %s" % e )
             s.close()
             raise
+    return s
+
+
+def send_mail( frm, to, subject, body, config ):
+    """
+    Sends an email.
+    """
+    to = listify( to )
+    msg = _build_mail_message( frm, to, subject, body )
+    if config.smtp_server is None:
+        log.error( "Mail is not configured for this Galaxy instance." )
+        log.info( msg )
+        return
+    s = _connect_smtp( config )
     s.sendmail( frm, to, msg.as_string() )
     s.quit()
 
 
+def send_mail_bulk( frm, messages, subject, config ):
+    """
+    Sends a separate email for each ( to, body ) pair in messages over a single
+    SMTP connection.  A failure to deliver to one address is logged and does not
+    prevent delivery to the others.  If the server drops the connection, it is
+    reopened once; if it is dropped again, the addresses that were not sent to
+    are logged.
+    """
+    messages = list( messages )
+    if not messages:
+        return
+    if config.smtp_server is None:
+        log.error( "Mail is not configured for this Galaxy instance." )
+        for to, body in messages:
+            log.info( _build_mail_message( frm, [ to ], subject, body ) )
+        return
+    s = _connect_smtp( config )
+    reconnected = False
+    index = 0
+    try:
+        while index < len( messages ):
+            to, body = messages[ index ]
+            msg = _build_mail_message( frm, [ to ], subject, body )
+            try:
+                s.sendmail( frm, [ to ], msg.as_string() )
+            except smtplib.SMTPServerDisconnected:
+                undelivered = ', '.join( to for to, body in messages[ index: ] )
+                if reconnected:
+                    log.exception( "The SMTP server disconnected again, so email was not sent to: %s" % undelivered )
+                    return
+                reconnected = True
+                try:
+                    s = _connect_smtp( config )
+                except Exception:
+                    log.exception( "Unable to reconnect to the SMTP server, so email was not sent to: %s" % undelivered )
+                    raise
+                # Retry the message that was being sent when the server disconnected.
+                continue
+            except smtplib.SMTPException:
+                log.exception( "Unable to send email to %s." % to )
+            index += 1
+    finally:
+        try:
+            s.quit()
+        except smtplib.SMTPServerDisconnected:
+            pass
+
+
 def force_symlink( source, link_name ):
     try:
         os.symlink( source, link_name )
@@ -4,14 +4,12 @@ from galaxy.web.base.controller import BaseUIController
 
 from tool_shed.util.common_util import generate_clone_url_for_repository_in_tool_shed
 from tool_shed.util.shed_util_common import get_repository_by_name_and_owner
-from tool_shed.util.hg_util import update_repository
+from tool_shed.util.hg_util import get_repo_for_repository, update_repository
 from tool_shed.metadata import repository_metadata_manager
 
 import mercurial.__version__
 from mercurial.hgweb.hgwebdir_mod import hgwebdir
 from mercurial.hgweb.request import wsgiapplication
-from mercurial import hg
-from mercurial import ui
 
 log = logging.getLogger(__name__)
 
@@ -47,7 +45,7 @@ class HgController( BaseUIController ):
                         # form uses the on-disk working directory. If the repository is not updated
                         # on disk, pushing from the command line and then uploading  via the web
                         # interface will result in a new head being created.
-                        repo = hg.repository( ui.ui(), repository.repo_path( trans.app ) )
+                        repo = get_repo_for_repository( trans.app, repository=repository, repo_path=None, create=False )
                         update_repository( repo, ctx_rev=None )
                         repository_clone_url = generate_clone_url_for_repository_in_tool_shed( trans.user, repository )
                         # Set metadata using the repository files on disk.
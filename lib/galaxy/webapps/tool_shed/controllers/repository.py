@@ -28,6 +28,7 @@ from tool_shed.metadata import repository_metadata_manager
 from tool_shed.tools import tool_validator
 from tool_shed.tools import tool_version_manager
 from tool_shed.util import basic_util
+from tool_shed.util import commit_util
 from tool_shed.util import common_util
 from tool_shed.util import encoding_util
 from tool_shed.util import hg_util
@@ -698,7 +699,7 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
             operation = kwd[ 'operation' ].lower()
             if operation == "preview_tools_in_changeset":
                 repository = suc.get_repository_in_tool_shed( trans.app, repository_id )
-                repository_metadata = metadata_util.get_latest_repository_metadata( trans.app, repository.id, downloadable=True )
+                repository_metadata = metadata_util.get_latest_repository_metadata( trans.app, repository, downloadable=True )
                 latest_installable_changeset_revision = repository_metadata.changeset_revision
                 return trans.response.send_redirect( web.url_for( controller='repository',
                                                                   action='preview_tools_in_changeset',
@@ -1175,9 +1176,11 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
                     # We've received a list of RepositoryMetadata ids, so we need to build a list of associated Repository ids.
                     encoded_repository_ids = []
                     changeset_revisions = []
-                    for repository_metadata_id in util.listify( item_id ):
-                        repository_metadata = metadata_util.get_repository_metadata_by_id( trans.app, repository_metadata_id )
-                        encoded_repository_ids.append( trans.security.encode_id( repository_metadata.repository.id ) )
+                    repository_metadata_ids = util.listify( item_id )
+                    repository_metadata_by_id = metadata_util.get_repository_metadata_by_ids( trans.app, repository_metadata_ids )
+                    for repository_metadata_id in repository_metadata_ids:
+                        repository_metadata = repository_metadata_by_id[ repository_metadata_id ]
+                        encoded_repository_ids.append( trans.security.encode_id( repository_metadata.repository_id ) )
                         changeset_revisions.append( repository_metadata.changeset_revision )
                     new_kwd = {}
                     new_kwd[ 'repository_ids' ] = encoded_repository_ids
@@ -1266,9 +1269,11 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
                     # We've received a list of RepositoryMetadata ids, so we need to build a list of associated Repository ids.
                     encoded_repository_ids = []
                     changeset_revisions = []
-                    for repository_metadata_id in util.listify( item_id ):
-                        repository_metadata = metadata_util.get_repository_metadata_by_id( trans.app, item_id )
-                        encoded_repository_ids.append( trans.security.encode_id( repository_metadata.repository.id ) )
+                    repository_metadata_ids = util.listify( item_id )
+                    repository_metadata_by_id = metadata_util.get_repository_metadata_by_ids( trans.app, repository_metadata_ids )
+                    for repository_metadata_id in repository_metadata_ids:
+                        repository_metadata = repository_metadata_by_id[ repository_metadata_id ]
+                        encoded_repository_ids.append( trans.security.encode_id( repository_metadata.repository_id ) )
                         changeset_revisions.append( repository_metadata.changeset_revision )
                     new_kwd = {}
                     new_kwd[ 'repository_ids' ] = encoded_repository_ids
@@ -2116,10 +2121,7 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
         skip_tool_tests_checked = CheckboxField.is_checked( skip_tool_tests )
         skip_tool_tests_comment = kwd.get( 'skip_tool_tests_comment', '' )
         category_ids = util.listify( kwd.get( 'category_id', '' ) )
-        if repository.email_alerts:
-            email_alerts = json.loads( repository.email_alerts )
-        else:
-            email_alerts = []
+        email_alerts = repository.get_email_alerts()
         allow_push = kwd.get( 'allow_push', '' )
         error = False
         user = trans.user
@@ -2650,31 +2652,7 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
                 selected_files_to_delete = selected_files_to_delete.split( ',' )
                 # Get the current repository tip.
                 tip = repository.tip( trans.app )
-                for selected_file in selected_files_to_delete:
-                    try:
-                        hg_util.remove_file( repo.ui, repo, selected_file, force=True )
-                    except Exception, e:
-                        log.debug( "Error removing the following file using the mercurial API:\n %s" % str( selected_file ) )
-                        log.debug( "The error was: %s" % str( e ))
-                        log.debug( "Attempting to remove the file using a different approach." )
-                        relative_selected_file = selected_file.split( 'repo_%d' % repository.id )[1].lstrip( '/' )
-                        repo.dirstate.remove( relative_selected_file )
-                        repo.dirstate.write()
-                        absolute_selected_file = os.path.abspath( selected_file )
-                        if os.path.isdir( absolute_selected_file ):
-                            try:
-                                os.rmdir( absolute_selected_file )
-                            except OSError, e:
-                                # The directory is not empty
-                                pass
-                        elif os.path.isfile( absolute_selected_file ):
-                            os.remove( absolute_selected_file )
-                            dir = os.path.split( absolute_selected_file )[0]
-                            try:
-                                os.rmdir( dir )
-                            except OSError, e:
-                                # The directory is not empty
-                                pass
+                commit_util.remove_repository_files( repository, repo, selected_files_to_delete )
                 # Commit the change set.
                 if not commit_message:
                     commit_message = 'Deleted selected files'
@@ -2684,10 +2662,10 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
                                           username=trans.user.username,
                                           message=commit_message )
                 suc.handle_email_alerts( trans.app, trans.request.host, repository )
-                # Update the repository files for browsing.
-                hg_util.update_repository( repo )
                 # Get the new repository tip.
                 if tip == repository.tip( trans.app ):
+                    # Nothing was committed, so the working directory is still at the tip and there is nothing
+                    # to update.  When a new changeset is committed, committing moves the working directory to it.
                     message += 'No changes to repository.  '
                 else:
                     rmm = repository_metadata_manager.RepositoryMetadataManager( app=trans.app,
@@ -2732,12 +2710,11 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
             # Get the name of the server hosting the tool shed instance.
             host = trans.request.host
             # Build the email message
-            body = string.Template( suc.contact_owner_template ) \
-                .safe_substitute( username=trans.user.username,
-                                  repository_name=repository.name,
-                                  email=trans.user.email,
-                                  message=message,
-                                  host=host )
+            body = suc.CONTACT_OWNER_TEMPLATE.safe_substitute( username=trans.user.username,
+                                                               repository_name=repository.name,
+                                                               email=trans.user.email,
+                                                               message=message,
+                                                               host=host )
             subject = "Regarding your tool shed repository named %s" % repository.name
             # Send it
             try:
@@ -2770,10 +2747,7 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
             flush_needed = False
             for repository_id in repository_ids:
                 repository = suc.get_repository_in_tool_shed( trans.app, repository_id )
-                if repository.email_alerts:
-                    email_alerts = json.loads( repository.email_alerts )
-                else:
-                    email_alerts = []
+                email_alerts = repository.get_email_alerts()
                 if user.email in email_alerts:
                     email_alerts.remove( user.email )
                     repository.email_alerts = json.dumps( email_alerts )
@@ -3151,10 +3125,7 @@ class RepositoryController( BaseUIController, ratings_util.ItemRatings ):
         display_reviews = kwd.get( 'display_reviews', False )
         alerts = kwd.get( 'alerts', '' )
         alerts_checked = CheckboxField.is_checked( alerts )
-        if repository.email_alerts:
-            email_alerts = json.loads( repository.email_alerts )
-        else:
-            email_alerts = []
+        email_alerts = repository.get_email_alerts()
         repository_dependencies = None
         user = trans.user
         if user and kwd.get( 'receive_email_alerts_button', False ):
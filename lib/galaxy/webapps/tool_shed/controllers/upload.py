@@ -347,8 +347,11 @@ class UploadController( BaseUIController ):
             full_path = os.path.abspath( repo_dir )
         filenames_in_archive = []
         for root, dirs, files in os.walk( uploaded_directory ):
+            # Resolve the directory paths once instead of once per file in the directory.
+            abs_root = os.path.abspath( root )
+            relative_root = os.path.relpath( root, uploaded_directory )
             for uploaded_file in files:
-                relative_path = os.path.normpath( os.path.join( os.path.relpath( root, uploaded_directory ), uploaded_file ) )
+                relative_path = os.path.normpath( os.path.join( relative_root, uploaded_file ) )
                 if repository.type == rt_util.REPOSITORY_SUITE_DEFINITION:
                     ok = os.path.basename( uploaded_file ) == rt_util.REPOSITORY_DEPENDENCY_DEFINITION_FILENAME
                 elif repository.type == rt_util.TOOL_DEPENDENCY_DEFINITION:
@@ -356,15 +359,13 @@ class UploadController( BaseUIController ):
                 else:
                     ok = os.path.basename( uploaded_file ) not in commit_util.UNDESIRABLE_FILES
                 if ok:
-                    for file_path_item in relative_path.split( '/' ):
-                        if file_path_item in commit_util.UNDESIRABLE_DIRS:
-                            undesirable_dirs_removed += 1
-                            ok = False
-                            break
+                    if not commit_util.UNDESIRABLE_DIRS.isdisjoint( relative_path.split( '/' ) ):
+                        undesirable_dirs_removed += 1
+                        ok = False
                 else:
                     undesirable_files_removed += 1
                 if ok:
-                    uploaded_file_name = os.path.abspath( os.path.join( root, uploaded_file ) )
+                    uploaded_file_name = os.path.join( abs_root, uploaded_file )
                     if os.path.split( uploaded_file_name )[ -1 ] == rt_util.REPOSITORY_DEPENDENCY_DEFINITION_FILENAME:
                         # Inspect the contents of the file to see if toolshed or changeset_revision
                         # attributes are missing and if so, set them appropriately.
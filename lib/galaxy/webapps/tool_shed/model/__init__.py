@@ -1,3 +1,4 @@
+import json
 import logging
 import operator
 import os
@@ -221,6 +222,19 @@ class Repository( object, Dictifiable ):
         type_class = self.get_type_class( app )
         return type_class.get_changesets_for_setting_metadata( app, self )
 
+    def get_email_alerts( self ):
+        """
+        Return a new list of the email addresses of users subscribed to alerts for this repository.
+        The stored value is decoded only when it has changed since the previous call.
+        """
+        if not self.email_alerts:
+            return []
+        cached_email_alerts = getattr( self, '_email_alerts_cache', None )
+        if cached_email_alerts is None or cached_email_alerts[ 0 ] != self.email_alerts:
+            cached_email_alerts = ( self.email_alerts, json.loads( self.email_alerts ) )
+            self._email_alerts_cache = cached_email_alerts
+        return list( cached_email_alerts[ 1 ] )
+
     def get_type_class( self, app ):
         return app.repository_types_registry.get_class_by_label( self.type )
 
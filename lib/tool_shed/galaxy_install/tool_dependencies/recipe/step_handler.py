@@ -942,7 +942,7 @@ class RegexReplace( RecipeStep ):
             logfile = open( log_file, 'wb' )
         if os.path.isabs( action_dict[ 'filename' ] ):
             filename = action_dict[ 'filename' ]
-            if not ( filename.startswith( current_dir ) or filename.startswith( install_environment.install_dir ) ):
+            if not filename.startswith( ( current_dir, install_environment.install_dir ) ):
                 return tool_dependency, None, None
         else:
             filename = os.path.abspath( os.path.join( current_dir, action_dict[ 'filename' ] ) )
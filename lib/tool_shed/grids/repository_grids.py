@@ -2,11 +2,14 @@ import logging
 
 from markupsafe import escape as escape_html
 from sqlalchemy import and_, false, or_, true
+from sqlalchemy.orm import contains_eager, joinedload, subqueryload
+from sqlalchemy.sql.expression import Join
+from sqlalchemy.sql.util import surface_selectables
 
 import tool_shed.grids.util as grids_util
 import tool_shed.repository_types.util as rt_util
 import tool_shed.util.shed_util_common as suc
-from galaxy.util import json, listify
+from galaxy.util import listify
 from galaxy.web.framework.helpers import grids
 from galaxy.webapps.tool_shed import model
 from tool_shed.util import hg_util, metadata_util
@@ -226,7 +229,7 @@ class RepositoryGrid( grids.Grid ):
     class EmailAlertsColumn( grids.TextColumn ):
 
         def get_value( self, trans, grid, repository ):
-            if trans.user and repository.email_alerts and trans.user.email in json.loads( repository.email_alerts ):
+            if trans.user and trans.user.email in repository.get_email_alerts():
                 return 'yes'
             return ''
 
@@ -280,6 +283,42 @@ class RepositoryGrid( grids.Grid ):
     preserve_state = False
     use_paging = False
 
+    def apply_query_filter( self, trans, query, **kwd ):
+        # Every row displays its owner, so load it with the repositories rather than
+        # issuing another query per row.  Most initial queries already join the owner,
+        # in which case its columns are read from that join rather than joining again.
+        if self.joins_repository_owner( query ):
+            query = query.options( contains_eager( 'user' ) )
+        else:
+            query = query.options( joinedload( 'user' ) )
+        if self.displays_metadata_revisions():
+            # Load the metadata revisions with a single separate query so that the rows are
+            # not multiplied by the category and metadata joins in build_initial_query().
+            query = query.options( subqueryload( 'metadata_revisions' ) )
+        return query
+
+    def displays_metadata_revisions( self ):
+        """Return True if any column of this grid inspects each repository's metadata revisions."""
+        metadata_columns = ( RepositoryGrid.MetadataRevisionColumn, RepositoryGrid.ToolsFunctionallyCorrectColumn )
+        for column in self.columns:
+            if isinstance( column, metadata_columns ):
+                return True
+        return False
+
+    def joins_repository_owner( self, query ):
+        """
+        Return True if the received query joins the galaxy_user table on each repository's owner
+        rather than, for example, on the user that reviewed it.
+        """
+        owner_clause = model.User.table.c.id == model.Repository.table.c.user_id
+        for from_clause in query.with_labels().statement.froms:
+            for selectable in surface_selectables( from_clause ):
+                if isinstance( selectable, Join ) and \
+                        selectable.right is model.User.table and \
+                        selectable.onclause.compare( owner_clause ):
+                    return True
+        return False
+
     def build_initial_query( self, trans, **kwd ):
         filter = trans.app.repository_grid_filter_manager.get_filter( trans )
         if filter == trans.app.repository_grid_filter_manager.filters.CERTIFIED_LEVEL_ONE:
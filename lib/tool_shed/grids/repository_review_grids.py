@@ -75,13 +75,15 @@ class RepositoriesWithReviewsGrid( RepositoryGrid ):
             repository_metadata_revisions = metadata_util.get_repository_metadata_revisions_for_review( repository, reviewed=False )
             if repository_metadata_revisions:
                 rval = ''
+                repo = hg_util.get_repo_for_repository( trans.app, repository=repository, repo_path=None, create=False )
                 for repository_metadata in repository_metadata_revisions:
                     rev, label, changeset_revision = \
                         hg_util.get_rev_label_changeset_revision_from_repository_metadata( trans.app,
                                                                                            repository_metadata,
                                                                                            repository=repository,
                                                                                            include_date=True,
-                                                                                           include_hash=False )
+                                                                                           include_hash=False,
+                                                                                           repo=repo )
                     rval += '<a href="manage_repository_reviews_of_revision?id=%s&changeset_revision=%s">%s</a><br/>' % \
                         ( trans.security.encode_id( repository.id ), changeset_revision, label )
                 return rval
@@ -36,31 +36,31 @@ def build_changeset_revision_select_field( trans, repository, selected_value=Non
     elif reviewed:
         # Restrict the options to revisions that have been reviewed.
         repository_metadata_revisions = []
-        metadata_changeset_revision_hashes = []
-        for metadata_revision in repository.metadata_revisions:
-            metadata_changeset_revision_hashes.append( metadata_revision.changeset_revision )
+        metadata_changeset_revision_hashes = set( metadata_revision.changeset_revision
+                                                  for metadata_revision in repository.metadata_revisions )
         for review in repository.reviews:
             if review.changeset_revision in metadata_changeset_revision_hashes:
                 repository_metadata_revisions.append( review.repository_metadata )
     elif not_reviewed:
         # Restrict the options to revisions that have not yet been reviewed.
         repository_metadata_revisions = []
-        reviewed_metadata_changeset_revision_hashes = []
-        for review in repository.reviews:
-            reviewed_metadata_changeset_revision_hashes.append( review.changeset_revision )
+        reviewed_metadata_changeset_revision_hashes = set( review.changeset_revision for review in repository.reviews )
         for metadata_revision in repository.metadata_revisions:
             if metadata_revision.changeset_revision not in reviewed_metadata_changeset_revision_hashes:
                 repository_metadata_revisions.append( metadata_revision )
     else:
         # Restrict the options to all revisions that have associated metadata.
         repository_metadata_revisions = repository.metadata_revisions
+    # Open the repository once for labeling all of the revisions.
+    repo = hg_util.get_repo_for_repository( trans.app, repository=repository, repo_path=None, create=False )
     for repository_metadata in repository_metadata_revisions:
         rev, label, changeset_revision = \
             hg_util.get_rev_label_changeset_revision_from_repository_metadata( trans.app,
                                                                                repository_metadata,
                                                                                repository=repository,
                                                                                include_date=True,
-                                                                               include_hash=False )
+                                                                               include_hash=False,
+                                                                               repo=repo )
         changeset_tups.append( ( rev, label, changeset_revision ) )
         refresh_on_change_values.append( changeset_revision )
     # Sort options by the revision label.  Even though the downloadable_revisions query sorts by update_time,
@@ -93,6 +93,10 @@ class MetadataGenerator( object ):
                                   rt_util.REPOSITORY_DEPENDENCY_DEFINITION_FILENAME,
                                   rt_util.TOOL_DEPENDENCY_DEFINITION_FILENAME,
                                   suc.REPOSITORY_DATA_MANAGER_CONFIG_FILENAME ]
+        # Config files whose first occurrence on disk is located while walking the repository files.
+        self.DISK_CONFIGS = set( [ suc.DATATYPES_CONFIG_FILENAME,
+                                   rt_util.TOOL_DEPENDENCY_DEFINITION_FILENAME,
+                                   suc.REPOSITORY_DATA_MANAGER_CONFIG_FILENAME ] )
 
     def generate_data_manager_metadata( self, repo_dir, data_manager_config_filename, metadata_dict,
                                         shed_config_dict=None ):
@@ -309,7 +313,7 @@ class MetadataGenerator( object ):
             original_repository_metadata = self.repository.metadata
         else:
             original_repository_metadata = None
-        readme_file_names = readme_util.get_readme_file_names( str( self.repository.name ) )
+        readme_file_names = set( readme_util.get_readme_file_names( str( self.repository.name ) ) )
         if self.app.name == 'galaxy':
             # Shed related tool panel configs are only relevant to Galaxy.
             metadata_dict = { 'shed_config_filename' : self.shed_config_dict.get( 'config_filename' ) }
@@ -342,8 +346,28 @@ class MetadataGenerator( object ):
                 files_dir = os.path.join( self.shed_config_dict[ 'tool_path' ], files_dir )
             self.app.config.tool_data_path = work_dir  # FIXME: Thread safe?
             self.app.config.tool_data_table_config_path = work_dir
+        # Walk the repository files on disk a single time, collecting the config files, sample files
+        # and candidate tool, workflow, etc files that are processed below.
+        config_paths = {}
+        sample_file_tups = []
+        file_tups = []
+        for root, dirs, files in os.walk( files_dir ):
+            # Prune the mercurial directory so it is never descended into.
+            if '.hg' in dirs:
+                dirs.remove( '.hg' )
+            # The value of files_dir may be a relative path, so resolve each directory once here rather
+            # than resolving the path of each file in it.
+            abs_root = os.path.abspath( root )
+            for name in files:
+                if name in self.DISK_CONFIGS and name not in config_paths:
+                    config_paths[ name ] = os.path.join( abs_root, name )
+                # Determine the file extension once rather than testing the name against each suffix.
+                extension = os.path.splitext( name )[ 1 ]
+                if extension == '.sample':
+                    sample_file_tups.append( ( root, name ) )
+                file_tups.append( ( root, abs_root, name, extension ) )
         # Handle proprietary datatypes, if any.
-        datatypes_config = hg_util.get_config_from_disk( suc.DATATYPES_CONFIG_FILENAME, files_dir )
+        datatypes_config = config_paths.get( suc.DATATYPES_CONFIG_FILENAME )
         if datatypes_config:
             metadata_dict = self.generate_datatypes_metadata( tv,
                                                               files_dir,
@@ -352,9 +376,10 @@ class MetadataGenerator( object ):
         # Get the relative path to all sample files included in the repository for storage in
         # the repository's metadata.
         sample_file_metadata_paths, sample_file_copy_paths = \
-            self.get_sample_files_from_disk( repository_files_dir=files_dir,
-                                             tool_path=self.shed_config_dict.get( 'tool_path' ),
-                                             relative_install_dir=self.relative_install_dir )
+            self.get_sample_file_paths( sample_file_tups,
+                                        repository_files_dir=files_dir,
+                                        tool_path=self.shed_config_dict.get( 'tool_path' ),
+                                        relative_install_dir=self.relative_install_dir )
         if sample_file_metadata_paths:
             metadata_dict[ 'sample_files' ] = sample_file_metadata_paths
         # Copy all sample files included in the repository to a single directory location so we
@@ -372,92 +397,89 @@ class MetadataGenerator( object ):
                                                                                 persist=False )
                 if error_message:
                     self.invalid_file_tups.append( ( filename, error_message ) )
-        for root, dirs, files in os.walk( files_dir ):
-            if root.find( '.hg' ) < 0 and root.find( 'hgrc' ) < 0:
-                if '.hg' in dirs:
-                    dirs.remove( '.hg' )
-                for name in files:
-                    # See if we have a repository dependencies defined.
-                    if name == rt_util.REPOSITORY_DEPENDENCY_DEFINITION_FILENAME:
-                        path_to_repository_dependencies_config = os.path.join( root, name )
-                        metadata_dict, error_message = \
-                            self.generate_repository_dependency_metadata( path_to_repository_dependencies_config,
-                                                                          metadata_dict )
-                        if error_message:
+        for root, abs_root, name, extension in file_tups:
+            # See if we have a repository dependencies defined.
+            if name == rt_util.REPOSITORY_DEPENDENCY_DEFINITION_FILENAME:
+                path_to_repository_dependencies_config = os.path.join( root, name )
+                metadata_dict, error_message = \
+                    self.generate_repository_dependency_metadata( path_to_repository_dependencies_config,
+                                                                  metadata_dict )
+                if error_message:
+                    self.invalid_file_tups.append( ( name, error_message ) )
+            # See if we have one or more READ_ME files.
+            elif name.lower() in readme_file_names:
+                relative_path_to_readme = self.get_relative_path_to_repository_file( root,
+                                                                                     name,
+                                                                                     self.relative_install_dir,
+                                                                                     work_dir,
+                                                                                     self.shed_config_dict )
+                readme_files.append( relative_path_to_readme )
+            # See if we have a tool config.
+            elif extension == '.xml' and looks_like_a_tool( os.path.join( abs_root, name ), invalid_names=self.NOT_TOOL_CONFIGS ):
+                full_path = str( os.path.join( abs_root, name ) )  # why the str, seems very odd
+                element_tree, error_message = xml_util.parse_xml( full_path )
+                if element_tree is None:
+                    is_tool = False
+                else:
+                    element_tree_root = element_tree.getroot()
+                    is_tool = element_tree_root.tag == 'tool'
+                if is_tool:
+                    tool, valid, error_message = \
+                        tv.load_tool_from_config( self.app.security.encode_id( self.repository.id ),
+                                                  full_path )
+                    if tool is None:
+                        if not valid:
+                            invalid_tool_configs.append( name )
                             self.invalid_file_tups.append( ( name, error_message ) )
-                    # See if we have one or more READ_ME files.
-                    elif name.lower() in readme_file_names:
-                        relative_path_to_readme = self.get_relative_path_to_repository_file( root,
-                                                                                             name,
-                                                                                             self.relative_install_dir,
-                                                                                             work_dir,
-                                                                                             self.shed_config_dict )
-                        readme_files.append( relative_path_to_readme )
-                    # See if we have a tool config.
-                    elif looks_like_a_tool(os.path.join( root, name ), invalid_names=self.NOT_TOOL_CONFIGS ):
-                        full_path = str(os.path.abspath(os.path.join( root, name )))  # why the str, seems very odd
-                        element_tree, error_message = xml_util.parse_xml( full_path )
-                        if element_tree is None:
-                            is_tool = False
+                    else:
+                        invalid_files_and_errors_tups = \
+                            tv.check_tool_input_params( files_dir,
+                                                        name,
+                                                        tool,
+                                                        sample_file_copy_paths )
+                        can_set_metadata = True
+                        for tup in invalid_files_and_errors_tups:
+                            if name in tup:
+                                can_set_metadata = False
+                                invalid_tool_configs.append( name )
+                                break
+                        if can_set_metadata:
+                            relative_path_to_tool_config = \
+                                self.get_relative_path_to_repository_file( root,
+                                                                           name,
+                                                                           self.relative_install_dir,
+                                                                           work_dir,
+                                                                           self.shed_config_dict )
+                            metadata_dict = self.generate_tool_metadata( relative_path_to_tool_config,
+                                                                         tool,
+                                                                         metadata_dict )
                         else:
-                            element_tree_root = element_tree.getroot()
-                            is_tool = element_tree_root.tag == 'tool'
-                        if is_tool:
-                            tool, valid, error_message = \
-                                tv.load_tool_from_config( self.app.security.encode_id( self.repository.id ),
-                                                          full_path )
-                            if tool is None:
-                                if not valid:
-                                    invalid_tool_configs.append( name )
-                                    self.invalid_file_tups.append( ( name, error_message ) )
-                            else:
-                                invalid_files_and_errors_tups = \
-                                    tv.check_tool_input_params( files_dir,
-                                                                name,
-                                                                tool,
-                                                                sample_file_copy_paths )
-                                can_set_metadata = True
-                                for tup in invalid_files_and_errors_tups:
-                                    if name in tup:
-                                        can_set_metadata = False
-                                        invalid_tool_configs.append( name )
-                                        break
-                                if can_set_metadata:
-                                    relative_path_to_tool_config = \
-                                        self.get_relative_path_to_repository_file( root,
-                                                                                   name,
-                                                                                   self.relative_install_dir,
-                                                                                   work_dir,
-                                                                                   self.shed_config_dict )
-                                    metadata_dict = self.generate_tool_metadata( relative_path_to_tool_config,
-                                                                                 tool,
-                                                                                 metadata_dict )
-                                else:
-                                    for tup in invalid_files_and_errors_tups:
-                                        self.invalid_file_tups.append( tup )
-                    # Find all exported workflows.
-                    elif name.endswith( '.ga' ):
-                        relative_path = os.path.join( root, name )
-                        if os.path.getsize( os.path.abspath( relative_path ) ) > 0:
-                            fp = open( relative_path, 'rb' )
-                            workflow_text = fp.read()
-                            fp.close()
-                            if workflow_text:
-                                valid_exported_galaxy_workflow = True
-                                try:
-                                    exported_workflow_dict = json.loads( workflow_text )
-                                except Exception, e:
-                                    log.exception( "Skipping file %s since it does not seem to be a valid exported Galaxy workflow: %s"
-                                                   % ( str( relative_path ), str( e ) ) )
-                                    valid_exported_galaxy_workflow = False
-                            if valid_exported_galaxy_workflow and \
-                                'a_galaxy_workflow' in exported_workflow_dict and \
-                                    exported_workflow_dict[ 'a_galaxy_workflow' ] == 'true':
-                                metadata_dict = self.generate_workflow_metadata( relative_path,
-                                                                                 exported_workflow_dict,
-                                                                                 metadata_dict )
+                            for tup in invalid_files_and_errors_tups:
+                                self.invalid_file_tups.append( tup )
+            # Find all exported workflows.
+            elif extension == '.ga':
+                relative_path = os.path.join( root, name )
+                # An empty file yields no text, so there is no need to check its size on disk first.
+                with open( relative_path, 'rb' ) as fp:
+                    workflow_text = fp.read()
+                # Only decode files that can possibly be exported Galaxy workflows, since the
+                # a_galaxy_workflow key is the only thing checked before the text is discarded.
+                if '"a_galaxy_workflow"' in workflow_text:
+                    valid_exported_galaxy_workflow = True
+                    try:
+                        exported_workflow_dict = json.loads( workflow_text )
+                    except Exception, e:
+                        log.exception( "Skipping file %s since it does not seem to be a valid exported Galaxy workflow: %s"
+                                       % ( str( relative_path ), str( e ) ) )
+                        valid_exported_galaxy_workflow = False
+                    if valid_exported_galaxy_workflow and \
+                        'a_galaxy_workflow' in exported_workflow_dict and \
+                            exported_workflow_dict[ 'a_galaxy_workflow' ] == 'true':
+                        metadata_dict = self.generate_workflow_metadata( relative_path,
+                                                                         exported_workflow_dict,
+                                                                         metadata_dict )
         # Handle any data manager entries
-        data_manager_config = hg_util.get_config_from_disk( suc.REPOSITORY_DATA_MANAGER_CONFIG_FILENAME, files_dir )
+        data_manager_config = config_paths.get( suc.REPOSITORY_DATA_MANAGER_CONFIG_FILENAME )
         metadata_dict = self.generate_data_manager_metadata( files_dir,
                                                              data_manager_config,
                                                              metadata_dict,
@@ -466,7 +488,7 @@ class MetadataGenerator( object ):
         if readme_files:
             metadata_dict[ 'readme_files' ] = readme_files
         # This step must be done after metadata for tools has been defined.
-        tool_dependencies_config = hg_util.get_config_from_disk( rt_util.TOOL_DEPENDENCY_DEFINITION_FILENAME, files_dir )
+        tool_dependencies_config = config_paths.get( rt_util.TOOL_DEPENDENCY_DEFINITION_FILENAME )
         if tool_dependencies_config:
             metadata_dict, error_message = \
                 self.generate_tool_dependency_metadata( tool_dependencies_config,
@@ -821,34 +843,35 @@ class MetadataGenerator( object ):
                 relative_path_to_file = relative_path_to_file[ len( shed_config_dict.get( 'tool_path' ) ) + 1: ]
         return relative_path_to_file
 
-    def get_sample_files_from_disk( self, repository_files_dir, tool_path=None, relative_install_dir=None ):
+    def get_sample_file_paths( self, sample_file_tups, repository_files_dir, tool_path=None, relative_install_dir=None ):
+        """
+        Return the metadata paths and the copy paths of the sample files found on disk, where
+        sample_file_tups is a list of ( root, name ) tuples for each sample file in repository_files_dir.
+        """
         if self.resetting_all_metadata_on_repository:
             # Keep track of the location where the repository is temporarily cloned so that we can strip
             # it when setting metadata.
             work_dir = repository_files_dir
         sample_file_metadata_paths = []
         sample_file_copy_paths = []
-        for root, dirs, files in os.walk( repository_files_dir ):
-            if root.find( '.hg' ) < 0:
-                for name in files:
-                    if name.endswith( '.sample' ):
-                        if self.resetting_all_metadata_on_repository:
-                            full_path_to_sample_file = os.path.join( root, name )
-                            stripped_path_to_sample_file = full_path_to_sample_file.replace( work_dir, '' )
-                            if stripped_path_to_sample_file.startswith( '/' ):
-                                stripped_path_to_sample_file = stripped_path_to_sample_file[ 1: ]
-                            relative_path_to_sample_file = os.path.join( relative_install_dir, stripped_path_to_sample_file )
-                            if os.path.exists( relative_path_to_sample_file ):
-                                sample_file_copy_paths.append( relative_path_to_sample_file )
-                            else:
-                                sample_file_copy_paths.append( full_path_to_sample_file )
-                        else:
-                            relative_path_to_sample_file = os.path.join( root, name )
-                            sample_file_copy_paths.append( relative_path_to_sample_file )
-                            if tool_path and relative_install_dir:
-                                if relative_path_to_sample_file.startswith( os.path.join( tool_path, relative_install_dir ) ):
-                                    relative_path_to_sample_file = relative_path_to_sample_file[ len( tool_path ) + 1 :]
-                        sample_file_metadata_paths.append( relative_path_to_sample_file )
+        for root, name in sample_file_tups:
+            if self.resetting_all_metadata_on_repository:
+                full_path_to_sample_file = os.path.join( root, name )
+                stripped_path_to_sample_file = full_path_to_sample_file.replace( work_dir, '' )
+                if stripped_path_to_sample_file.startswith( '/' ):
+                    stripped_path_to_sample_file = stripped_path_to_sample_file[ 1: ]
+                relative_path_to_sample_file = os.path.join( relative_install_dir, stripped_path_to_sample_file )
+                if os.path.exists( relative_path_to_sample_file ):
+                    sample_file_copy_paths.append( relative_path_to_sample_file )
+                else:
+                    sample_file_copy_paths.append( full_path_to_sample_file )
+            else:
+                relative_path_to_sample_file = os.path.join( root, name )
+                sample_file_copy_paths.append( relative_path_to_sample_file )
+                if tool_path and relative_install_dir:
+                    if relative_path_to_sample_file.startswith( os.path.join( tool_path, relative_install_dir ) ):
+                        relative_path_to_sample_file = relative_path_to_sample_file[ len( tool_path ) + 1 :]
+            sample_file_metadata_paths.append( relative_path_to_sample_file )
         return sample_file_metadata_paths, sample_file_copy_paths
 
     def handle_repository_elem( self, repository_elem, only_if_compiling_contained_td=False ):
@@ -561,18 +561,15 @@ class RepositoryMetadataManager( metadata_generator.MetadataGenerator ):
         # table record is not needed.
         return False
 
-    def new_metadata_required_for_utilities( self ):
+    def new_metadata_required_for_utilities( self, repository_metadata ):
         """
         This method compares the last stored repository_metadata record associated with self.repository
         against the contents of self.metadata_dict and returns True or False for the union set of Galaxy
         utilities contained in both metadata dictionaries.  The metadata contained in self.metadata_dict
         may not be a subset of that contained in the last stored repository_metadata record associated with
         self.repository because one or more Galaxy utilities may have been deleted from self.repository in
-        the new tip.
+        the new tip.  The received repository_metadata is the last stored record, which may be None.
         """
-        repository_metadata = metadata_util.get_latest_repository_metadata( self.app,
-                                                                            self.repository.id,
-                                                                            downloadable=False )
         datatypes_required = self.new_datatypes_metadata_required( repository_metadata )
         # Uncomment the following if we decide that README files should affect how installable
         # repository revisions are defined.  See the NOTE in the compare_readme_files() method.
@@ -685,25 +682,27 @@ class RepositoryMetadataManager( metadata_generator.MetadataGenerator ):
                 metadata = repository_metadata.metadata
                 if metadata:
                     if 'tools' in metadata:
-                        saved_tool_ids = []
+                        # Map each saved tool id to the set of its saved versions so each new tool is
+                        # compared with a dictionary lookup rather than a scan of all saved tools.
+                        saved_tool_versions = {}
+                        for saved_tool_metadata_dict in metadata[ 'tools' ]:
+                            saved_tool_versions.setdefault( saved_tool_metadata_dict[ 'id' ], set() ) \
+                                .add( saved_tool_metadata_dict[ 'version' ] )
                         # The metadata for one or more tools was successfully generated in the past
-                        # for this repository, so we first compare the version string for each tool id
+                        # for this repository, so we compare the version string for each tool id
                         # in self.metadata_dict with what was previously saved to see if we need to create
-                        # a new table record or if we can simply update the existing record.
+                        # a new table record or if we can simply update the existing record.  We also have
+                        # to check to see if any new tool ids exist in self.metadata_dict that are not in the
+                        # saved metadata.  We do this because if a new tarball was uploaded to a repository that
+                        # included tools, it may have removed existing tool files if they were not included in
+                        # the uploaded tarball.
                         for new_tool_metadata_dict in self.metadata_dict[ 'tools' ]:
-                            for saved_tool_metadata_dict in metadata[ 'tools' ]:
-                                if saved_tool_metadata_dict[ 'id' ] not in saved_tool_ids:
-                                    saved_tool_ids.append( saved_tool_metadata_dict[ 'id' ] )
-                                if new_tool_metadata_dict[ 'id' ] == saved_tool_metadata_dict[ 'id' ]:
-                                    if new_tool_metadata_dict[ 'version' ] != saved_tool_metadata_dict[ 'version' ]:
-                                        return True
-                        # So far, a new metadata record is not required, but we still have to check to see if
-                        # any new tool ids exist in self.metadata_dict that are not in the saved metadata.  We do
-                        # this because if a new tarball was uploaded to a repository that included tools, it
-                        # may have removed existing tool files if they were not included in the uploaded tarball.
-                        for new_tool_metadata_dict in self.metadata_dict[ 'tools' ]:
-                            if new_tool_metadata_dict[ 'id' ] not in saved_tool_ids:
+                            saved_versions = saved_tool_versions.get( new_tool_metadata_dict[ 'id' ] )
+                            if saved_versions is None:
                                 return True
+                            for saved_version in saved_versions:
+                                if saved_version != new_tool_metadata_dict[ 'version' ]:
+                                    return True
                         return False
                     else:
                         # The new metadata includes tools, but the stored metadata does not, so we can
@@ -973,7 +972,12 @@ class RepositoryMetadataManager( metadata_generator.MetadataGenerator ):
             repository_metadata = None
             repository_type_class = self.app.repository_types_registry.get_class_by_label( self.repository.type )
             tip_only = isinstance( repository_type_class, TipOnly )
-            if not tip_only and self.new_metadata_required_for_utilities():
+            # Retrieve the latest stored repository metadata once since both the comparison against
+            # self.metadata_dict and the update of the stored record below need it.
+            latest_repository_metadata = metadata_util.get_latest_repository_metadata( self.app,
+                                                                                       self.repository,
+                                                                                       downloadable=False )
+            if not tip_only and self.new_metadata_required_for_utilities( latest_repository_metadata ):
                 # Create a new repository_metadata table row.
                 repository_metadata = self.create_or_update_repository_metadata( self.repository.tip( self.app ),
                                                                                  self.metadata_dict )
@@ -987,9 +991,7 @@ class RepositoryMetadataManager( metadata_generator.MetadataGenerator ):
                                              admin_only=False )
             else:
                 # Update the latest stored repository metadata with the contents and attributes of self.metadata_dict.
-                repository_metadata = metadata_util.get_latest_repository_metadata( self.app,
-                                                                                    self.repository.id,
-                                                                                    downloadable=False )
+                repository_metadata = latest_repository_metadata
                 if repository_metadata:
                     downloadable = metadata_util.is_downloadable( self.metadata_dict )
                     # Update the last saved repository_metadata table row.
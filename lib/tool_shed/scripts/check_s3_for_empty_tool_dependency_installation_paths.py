@@ -38,7 +38,7 @@ class BucketList( object ):
         for item in self.bucket.list():
             name = str( item.name )
             # Skip environment_settings and __virtualenv_src, since these directories do not contain package tool dependencies.
-            if name.startswith( 'environment_settings' ) or name.startswith( '__virtualenv_src' ):
+            if name.startswith( ( 'environment_settings', '__virtualenv_src' ) ):
                 continue
             paths = name.rstrip('/').split( '/' )
             # Paths are in the format name/version/owner/repository/changeset_revision. If the changeset revision is
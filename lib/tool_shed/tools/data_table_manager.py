@@ -53,7 +53,7 @@ class ToolDataTableManager( object ):
         for s in sample_files:
             # The problem with this is that Galaxy does not follow a standard naming
             # convention for file names.
-            if s.endswith( '.loc.sample' ) or s.endswith( '.xml.sample' ) or s.endswith( '.txt.sample' ):
+            if s.endswith( ( '.loc.sample', '.xml.sample', '.txt.sample' ) ):
                 tool_index_sample_files.append( str( s ) )
         return tool_index_sample_files
 
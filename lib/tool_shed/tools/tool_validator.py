@@ -54,6 +54,11 @@ class ToolValidator( object ):
         """
         invalid_files_and_errors_tups = []
         correction_msg = ''
+        # The names of the sample files and the location of the tool_data_table_conf.xml.sample file
+        # are determined at most once rather than for each dynamically generated select parameter.
+        sample_file_names = None
+        sample_tool_data_table_conf = None
+        searched_for_sample_tool_data_table_conf = False
         for input_param in tool.input_params:
             if isinstance( input_param, parameters.basic.SelectToolParameter ) and input_param.is_dynamic:
                 # If the tool refers to .loc files or requires an entry in the tool_data_table_conf.xml,
@@ -62,7 +67,9 @@ class ToolValidator( object ):
                 if options and isinstance( options, dynamic_options.DynamicOptions ):
                     if options.tool_data_table or options.missing_tool_data_table_name:
                         # Make sure the repository contains a tool_data_table_conf.xml.sample file.
-                        sample_tool_data_table_conf = hg_util.get_config_from_disk( 'tool_data_table_conf.xml.sample', repo_dir )
+                        if not searched_for_sample_tool_data_table_conf:
+                            sample_tool_data_table_conf = hg_util.get_config_from_disk( 'tool_data_table_conf.xml.sample', repo_dir )
+                            searched_for_sample_tool_data_table_conf = True
                         if sample_tool_data_table_conf:
                             error, correction_msg = \
                                 self.tdtm.handle_sample_tool_data_table_conf_file( sample_tool_data_table_conf,
@@ -82,17 +89,14 @@ class ToolValidator( object ):
                         # Make sure the repository contains the required xxx.loc.sample file.
                         index_file = options.index_file or options.missing_index_file
                         index_file_name = basic_util.strip_path( index_file )
-                        sample_found = False
-                        for sample_file in sample_files:
-                            sample_file_name = basic_util.strip_path( sample_file )
-                            if sample_file_name == '%s.sample' % index_file_name:
-                                options.index_file = index_file_name
-                                options.missing_index_file = None
-                                if options.tool_data_table:
-                                    options.tool_data_table.missing_index_file = None
-                                sample_found = True
-                                break
-                        if not sample_found:
+                        if sample_file_names is None:
+                            sample_file_names = set( basic_util.strip_path( sample_file ) for sample_file in sample_files )
+                        if '%s.sample' % index_file_name in sample_file_names:
+                            options.index_file = index_file_name
+                            options.missing_index_file = None
+                            if options.tool_data_table:
+                                options.tool_data_table.missing_index_file = None
+                        else:
                             correction_msg = "This file refers to a file named <b>%s</b>.  " % str( index_file_name )
                             correction_msg += "Upload a file named <b>%s.sample</b> to the repository to correct this error." % \
                                 str( index_file_name )
@@ -118,12 +122,13 @@ class ToolValidator( object ):
         """
         sample_files = []
         for root, dirs, files in os.walk( repo_files_dir ):
-            if root.find( '.hg' ) < 0:
-                for name in files:
-                    if name.endswith( '.sample' ):
-                        relative_path = os.path.join( root, name )
-                        tool_util.copy_sample_file( self.app, relative_path, dest_path=dest_path )
-                        sample_files.append( name )
+            if '.hg' in dirs:
+                dirs.remove( '.hg' )
+            for name in files:
+                if name.endswith( '.sample' ):
+                    relative_path = os.path.join( root, name )
+                    tool_util.copy_sample_file( self.app, relative_path, dest_path=dest_path )
+                    sample_files.append( name )
         return sample_files
 
     def get_latest_tool_config_revision_from_repository_manifest( self, repo, filename, changeset_revision ):
@@ -146,13 +151,11 @@ class ToolValidator( object ):
                         # 'ncbi_blastp_wrapper.xml' was moved to 'tools/ncbi_blast_plus/ncbi_blastp_wrapper.xml',
                         # so keep looking for the file until we find the new location.
                         continue
-                    fh = tempfile.NamedTemporaryFile( 'wb', prefix="tmp-toolshed-gltcrfrm" )
-                    tmp_filename = fh.name
-                    fh.close()
-                    fh = open( tmp_filename, 'wb' )
-                    fh.write( fctx.data() )
-                    fh.close()
-                    return tmp_filename
+                    # Write the file contents through the handle that created the file rather than
+                    # closing (and so deleting) it and opening it again by name.
+                    with tempfile.NamedTemporaryFile( 'wb', prefix="tmp-toolshed-gltcrfrm", delete=False ) as fh:
+                        fh.write( fctx.data() )
+                    return fh.name
         return None
 
     def get_list_of_copied_sample_files( self, repo, ctx, dir ):
@@ -166,6 +169,10 @@ class ToolValidator( object ):
         """
         deleted_sample_files = []
         sample_files = []
+        # Sets mirroring the lists above so that membership tests while walking the changelog do not
+        # scan the lists.
+        deleted_sample_file_names = set()
+        sample_file_names = set()
         for changeset in hg_util.reversed_upper_bounded_changelog( repo, ctx ):
             changeset_ctx = repo.changectx( changeset )
             for ctx_file in changeset_ctx.files():
@@ -173,7 +180,7 @@ class ToolValidator( object ):
                 # If we decide in the future that files deleted later in the changelog should
                 # not be used, we can use the following if statement. if ctx_file_name.endswith( '.sample' )
                 # and ctx_file_name not in sample_files and ctx_file_name not in deleted_sample_files:
-                if ctx_file_name.endswith( '.sample' ) and ctx_file_name not in sample_files:
+                if ctx_file_name.endswith( '.sample' ) and ctx_file_name not in sample_file_names:
                     fctx = hg_util.get_file_context_from_ctx( changeset_ctx, ctx_file )
                     if fctx in [ 'DELETED' ]:
                         # Since the possibly future used if statement above is commented out, the
@@ -184,9 +191,11 @@ class ToolValidator( object ):
                         # later discovered file in changeset 0 will be handled in the else block below.
                         # In this way, the file contents will always be found for future tools even though
                         # the file was deleted.
-                        if ctx_file_name not in deleted_sample_files:
+                        if ctx_file_name not in deleted_sample_file_names:
+                            deleted_sample_file_names.add( ctx_file_name )
                             deleted_sample_files.append( ctx_file_name )
                     else:
+                        sample_file_names.add( ctx_file_name )
                         sample_files.append( ctx_file_name )
                         tmp_ctx_file_name = os.path.join( dir, ctx_file_name.replace( '.sample', '' ) )
                         fh = open( tmp_ctx_file_name, 'wb' )
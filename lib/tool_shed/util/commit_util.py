@@ -1,6 +1,5 @@
 import bz2
 import gzip
-import json
 import logging
 import os
 import shutil
@@ -16,8 +15,8 @@ from tool_shed.util import basic_util, hg_util, shed_util_common as suc
 
 log = logging.getLogger( __name__ )
 
-UNDESIRABLE_DIRS = [ '.hg', '.svn', '.git', '.cvs' ]
-UNDESIRABLE_FILES = [ '.hg_archival.txt', 'hgrc', '.DS_Store', 'tool_test_output.html', 'tool_test_output.json' ]
+UNDESIRABLE_DIRS = frozenset( [ '.hg', '.svn', '.git', '.cvs' ] )
+UNDESIRABLE_FILES = frozenset( [ '.hg_archival.txt', 'hgrc', '.DS_Store', 'tool_test_output.html', 'tool_test_output.json' ] )
 
 
 def check_archive( repository, archive ):
@@ -70,8 +69,7 @@ def check_file_contents_for_email_alerts( app ):
     admin_users = app.config.get( "admin_users", "" ).split( "," )
     for repository in sa_session.query( app.model.Repository ) \
                                 .filter( app.model.Repository.table.c.email_alerts != null() ):
-        email_alerts = json.loads( repository.email_alerts )
-        for user_email in email_alerts:
+        for user_email in repository.get_email_alerts():
             if user_email in admin_users:
                 return True
     return False
@@ -157,45 +155,24 @@ def handle_directory_changes( app, host, username, repository, full_path, filena
     if remove_repo_files_not_in_tar and not repository.is_new( app ):
         # We have a repository that is not new (it contains files), so discover those files that are in the
         # repository, but not in the uploaded archive.
+        archived_filenames = set( filenames_in_archive )
         for root, dirs, files in os.walk( full_path ):
-            if root.find( '.hg' ) < 0 and root.find( 'hgrc' ) < 0:
-                for undesirable_dir in UNDESIRABLE_DIRS:
-                    if undesirable_dir in dirs:
-                        dirs.remove( undesirable_dir )
-                        undesirable_dirs_removed += 1
-                for undesirable_file in UNDESIRABLE_FILES:
-                    if undesirable_file in files:
-                        files.remove( undesirable_file )
-                        undesirable_files_removed += 1
-                for name in files:
-                    full_name = os.path.join( root, name )
-                    if full_name not in filenames_in_archive:
-                        files_to_remove.append( full_name )
-        for repo_file in files_to_remove:
-            # Remove files in the repository (relative to the upload point) that are not in
-            # the uploaded archive.
-            try:
-                hg_util.remove_file( repo.ui, repo, repo_file, force=True )
-            except Exception, e:
-                log.debug( "Error removing files using the mercurial API, so trying a different approach, the error was: %s" % str( e ))
-                relative_selected_file = repo_file.split( 'repo_%d' % repository.id )[1].lstrip( '/' )
-                repo.dirstate.remove( relative_selected_file )
-                repo.dirstate.write()
-                absolute_selected_file = os.path.abspath( repo_file )
-                if os.path.isdir( absolute_selected_file ):
-                    try:
-                        os.rmdir( absolute_selected_file )
-                    except OSError, e:
-                        # The directory is not empty.
-                        pass
-                elif os.path.isfile( absolute_selected_file ):
-                    os.remove( absolute_selected_file )
-                    dir = os.path.split( absolute_selected_file )[0]
-                    try:
-                        os.rmdir( dir )
-                    except OSError, e:
-                        # The directory is not empty.
-                        pass
+            # Pruning the undesirable directories, .hg included, keeps the walk out of mercurial's store.
+            for undesirable_dir in UNDESIRABLE_DIRS:
+                if undesirable_dir in dirs:
+                    dirs.remove( undesirable_dir )
+                    undesirable_dirs_removed += 1
+            for undesirable_file in UNDESIRABLE_FILES:
+                if undesirable_file in files:
+                    files.remove( undesirable_file )
+                    undesirable_files_removed += 1
+            for name in files:
+                full_name = os.path.join( root, name )
+                if full_name not in archived_filenames:
+                    files_to_remove.append( full_name )
+        # Remove files in the repository (relative to the upload point) that are not in
+        # the uploaded archive.
+        remove_repository_files( repository, repo, files_to_remove )
     # See if any admin users have chosen to receive email alerts when a repository is updated.
     # If so, check every uploaded file to ensure content is appropriate.
     check_contents = check_file_contents_for_email_alerts( app )
@@ -248,6 +225,53 @@ def handle_gzip( repository, uploaded_file_name ):
     shutil.move( uncompressed, uploaded_file_name )
 
 
+def remove_repository_file( repository, repo, repo_file ):
+    """
+    Remove the received file from the repository using the mercurial API, falling back to updating
+    the dirstate and removing the file from disk if mercurial cannot remove it.  If the fallback
+    removed a file, return the directory that contained it so the caller can prune it if it is now
+    empty, otherwise return None.
+    """
+    try:
+        hg_util.remove_file( repo.ui, repo, repo_file, force=True )
+    except Exception, e:
+        log.debug( "Error removing file %s using the mercurial API, so trying a different approach, the error was: %s" %
+                   ( str( repo_file ), str( e ) ) )
+        relative_selected_file = repo_file.split( 'repo_%d' % repository.id )[1].lstrip( '/' )
+        repo.dirstate.remove( relative_selected_file )
+        repo.dirstate.write()
+        absolute_selected_file = os.path.abspath( repo_file )
+        try:
+            os.unlink( absolute_selected_file )
+        except OSError:
+            try:
+                os.rmdir( absolute_selected_file )
+            except OSError:
+                # The path is missing or is a directory that is not empty.
+                pass
+        else:
+            return os.path.dirname( absolute_selected_file )
+    return None
+
+
+def remove_repository_files( repository, repo, repo_files ):
+    """
+    Remove each of the received files from the repository, then attempt to remove each directory
+    left behind by the fallback approach exactly once, deepest directories first.
+    """
+    dirs_to_prune = set()
+    for repo_file in repo_files:
+        dir = remove_repository_file( repository, repo, repo_file )
+        if dir is not None:
+            dirs_to_prune.add( dir )
+    for dir in sorted( dirs_to_prune, key=lambda d: d.count( os.sep ), reverse=True ):
+        try:
+            os.rmdir( dir )
+        except OSError:
+            # The directory is not empty.
+            pass
+
+
 def uncompress( repository, uploaded_file_name, uploaded_file_filename, isgzip=False, isbz2=False ):
     if isgzip:
         handle_gzip( repository, uploaded_file_name )
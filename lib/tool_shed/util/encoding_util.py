@@ -1,21 +1,34 @@
 import binascii
+import hmac
 import json
 import logging
 
-from galaxy.util.hash_util import hmac_new
+from galaxy.util import safe_str_cmp
+from galaxy.util.hash_util import sha1
 
 log = logging.getLogger( __name__ )
 
 encoding_sep = '__esep__'
 encoding_sep2 = '__esepii__'
 
+TOOL_SHED_HMAC_KEY = 'ToolShedAndGalaxyMustHaveThisSameKey'
+# Keyed once at import so each encode / decode only copies the already padded inner and outer hashes.
+_hmac_template = hmac.HMAC( TOOL_SHED_HMAC_KEY, digestmod=sha1 )
+
+
+def _tool_shed_hmac( value ):
+    mac = _hmac_template.copy()
+    mac.update( value )
+    return mac.hexdigest()
+
 
 def tool_shed_decode( value ):
     # Extract and verify hash
-    a, b = value.split( ":" )
+    a, b = value.split( ":", 1 )
     value = binascii.unhexlify( b )
-    test = hmac_new( 'ToolShedAndGalaxyMustHaveThisSameKey', value )
-    assert a == test
+    test = _tool_shed_hmac( value )
+    if not safe_str_cmp( a, test ):
+        raise ValueError( "Invalid hash for the received tool shed encoded value." )
     # Restore from string
     values = None
     try:
@@ -28,10 +41,13 @@ def tool_shed_decode( value ):
 
 
 def tool_shed_encode( val ):
-    if isinstance( val, dict ) or isinstance( val, list ):
-        value = json.dumps( val )
+    if isinstance( val, ( dict, list ) ):
+        # Compact separators keep the payload, and so its hexlified form, as small as possible.
+        value = json.dumps( val, separators=( ',', ':' ) )
     else:
         value = val
-    a = hmac_new( 'ToolShedAndGalaxyMustHaveThisSameKey', value )
+    a = _tool_shed_hmac( value )
+    # The payload stays hex encoded since Galaxy instances and Tool Sheds running other releases
+    # decode it with binascii.unhexlify().
     b = binascii.hexlify( value )
     return "%s:%s" % ( a, b )
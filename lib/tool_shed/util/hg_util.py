@@ -1,14 +1,16 @@
 import json
 import logging
 import os
+import re
 import struct
 import tempfile
+import threading
 from datetime import datetime
-from time import gmtime
 
-from mercurial import cmdutil, commands, hg, ui
+from mercurial import cmdutil, commands, error, hg, ui
 from mercurial.changegroup import readexactly
 from mercurial.exchange import readbundle
+from repoze.lru import LRUCache
 
 from galaxy.util import listify
 from tool_shed.util import basic_util
@@ -16,6 +18,24 @@ from tool_shed.util import basic_util
 log = logging.getLogger( __name__ )
 
 INITIAL_CHANGELOG_HASH = '000000000000'
+# The form of the changeset revision strings used throughout the tool shed, which are the 12
+# character short hashes of changesets.
+SHORT_CHANGESET_HASH_RE = re.compile( r'[0-9a-f]{12}\Z' )
+
+# The maximum number of open mercurial repositories kept by each thread.
+REPOSITORY_CACHE_SIZE = 64
+# The maximum number of changeset revision labels kept for building select fields.
+REVISION_LABEL_CACHE_SIZE = 4096
+
+# The configured mercurial ui from which the ui returned by get_configured_ui() is copied.
+_configured_ui = None
+# Added in mercurial 3.6, while the tool shed still supports older releases.
+_cachedlocalrepo = getattr( hg, 'cachedlocalrepo', None )
+# Per-thread caches of open mercurial repositories keyed by repository path.
+_repository_caches = threading.local()
+# Rev and label strings of changesets found in a repository, keyed by repository path, changeset
+# revision and label options.  A changeset's rev and date never change once it is committed.
+_revision_label_cache = LRUCache( REVISION_LABEL_CACHE_SIZE )
 
 
 def add_changeset( repo_ui, repo, path_to_filename_in_archive ):
@@ -113,10 +133,18 @@ def create_hgrc_file( app, repository ):
 
 def get_changectx_for_changeset( repo, changeset_revision, **kwd ):
     """Retrieve a specified changectx from a repository."""
-    for changeset in repo.changelog:
-        ctx = repo.changectx( changeset )
-        if str( ctx ) == changeset_revision:
-            return ctx
+    # Only the short hashes of changesets are accepted, so anything else (e.g., full hashes, revision
+    # numbers, tags or junk received in a request) is rejected before mercurial tries to resolve it.
+    if not isinstance( changeset_revision, basestring ) or not SHORT_CHANGESET_HASH_RE.match( changeset_revision ):
+        return None
+    # Let mercurial resolve the hash through the revlog index rather than walking the whole changelog.
+    try:
+        ctx = repo[ str( changeset_revision ) ]
+    except ( error.LookupError, error.RepoLookupError ):
+        return None
+    # The null revision is not a changeset in the changelog.
+    if ctx.rev() >= 0 and str( ctx ) == changeset_revision:
+        return ctx
     return None
 
 
@@ -134,22 +162,28 @@ def get_config( config_file, repo, ctx, dir ):
 
 def get_config_from_disk( config_file, relative_install_dir ):
     for root, dirs, files in os.walk( relative_install_dir ):
-        if root.find( '.hg' ) < 0:
-            for name in files:
-                if name == config_file:
-                    return os.path.abspath( os.path.join( root, name ) )
+        if '.hg' in dirs:
+            dirs.remove( '.hg' )
+        for name in files:
+            if name == config_file:
+                return os.path.abspath( os.path.join( root, name ) )
     return None
 
 
 def get_configured_ui():
     """Configure any desired ui settings."""
-    _ui = ui.ui()
-    # The following will suppress all messages.  This is
-    # the same as adding the following setting to the repo
-    # hgrc file' [ui] section:
-    # quiet = True
-    _ui.setconfig( 'ui', 'quiet', True )
-    return _ui
+    global _configured_ui
+    if _configured_ui is None:
+        _ui = ui.ui()
+        # The following will suppress all messages.  This is
+        # the same as adding the following setting to the repo
+        # hgrc file' [ui] section:
+        # quiet = True
+        _ui.setconfig( 'ui', 'quiet', True )
+        _configured_ui = _ui
+    # Constructing a ui reads the hgrc files from disk, so build it once and return
+    # a copy to keep callers from sharing state.
+    return _configured_ui.copy()
 
 
 def get_ctx_file_path_from_manifest( filename, repo, changeset_revision ):
@@ -224,29 +258,50 @@ def get_named_tmpfile_from_ctx( ctx, filename, dir ):
                 fctx = None
                 continue
             if fctx:
-                fh = tempfile.NamedTemporaryFile( 'wb', prefix="tmp-toolshed-gntfc", dir=dir )
-                tmp_filename = fh.name
-                fh.close()
-                fh = open( tmp_filename, 'wb' )
-                fh.write( fctx.data() )
-                fh.close()
-                return tmp_filename
+                with tempfile.NamedTemporaryFile( 'wb', prefix="tmp-toolshed-gntfc", dir=dir, delete=False ) as fh:
+                    fh.write( fctx.data() )
+                return fh.name
     return None
 
 
 def get_readable_ctx_date( ctx ):
     """Convert the date of the changeset (the received ctx) to a human-readable date."""
     t, tz = ctx.date()
-    date = datetime( *gmtime( float( t ) - tz )[ :6 ] )
-    ctx_date = date.strftime( "%Y-%m-%d" )
-    return ctx_date
+    return datetime.utcfromtimestamp( float( t ) - tz ).strftime( "%Y-%m-%d" )
+
+
+def get_cached_repo( repo_path ):
+    """
+    Return an open mercurial repository for repo_path, reusing the one previously opened by the
+    current thread unless the repository's store has changed on disk since it was opened.  Mercurial
+    releases older than 3.6 do not provide hg.cachedlocalrepo, so the repository is opened on every
+    call with those releases.
+    """
+    if _cachedlocalrepo is None:
+        return hg.repository( get_configured_ui(), repo_path )
+    cache = getattr( _repository_caches, 'repos', None )
+    if cache is None:
+        cache = _repository_caches.repos = LRUCache( REPOSITORY_CACHE_SIZE )
+    cached_repo = cache.get( repo_path )
+    if cached_repo is None:
+        repo = hg.repository( get_configured_ui(), repo_path )
+        cache.put( repo_path, _cachedlocalrepo( repo ) )
+        return repo
+    repo, created = cached_repo.fetch()
+    if not created:
+        # The working directory may have been changed since the repository was opened (e.g., by
+        # an hg update in another process), so make sure the dirstate is read from disk again.
+        repo.invalidatedirstate()
+    return repo
 
 
 def get_repo_for_repository( app, repository=None, repo_path=None, create=False ):
     if repository is not None:
-        return hg.repository( get_configured_ui(), repository.repo_path( app ), create=create )
+        repo_path = repository.repo_path( app )
     if repo_path is not None:
-        return hg.repository( get_configured_ui(), repo_path, create=create )
+        if create:
+            return hg.repository( get_configured_ui(), repo_path, create=create )
+        return get_cached_repo( repo_path )
 
 
 def get_repository_heads( repo ):
@@ -280,11 +335,17 @@ def get_revision_label( app, repository, changeset_revision, include_date=True,
 
 
 def get_rev_label_changeset_revision_from_repository_metadata( app, repository_metadata, repository=None,
-                                                               include_date=True, include_hash=True ):
-    if repository is None:
-        repository = repository_metadata.repository
-    repo = hg.repository( get_configured_ui(), repository.repo_path( app ) )
+                                                               include_date=True, include_hash=True, repo=None ):
+    if repo is None:
+        if repository is None:
+            repository = repository_metadata.repository
+        repo = get_repo_for_repository( app, repository=repository, repo_path=None, create=False )
     changeset_revision = repository_metadata.changeset_revision
+    cache_key = ( repo.root, changeset_revision, include_date, include_hash )
+    cached_rev_label = _revision_label_cache.get( cache_key )
+    if cached_rev_label is not None:
+        rev, label = cached_rev_label
+        return rev, label, changeset_revision
     ctx = get_changectx_for_changeset( repo, changeset_revision )
     if ctx:
         rev = '%04d' % ctx.rev()
@@ -299,6 +360,8 @@ def get_rev_label_changeset_revision_from_repository_metadata( app, repository_m
                 label = "%s:%s" % ( str( ctx.rev() ), changeset_revision )
             else:
                 label = "%s" % str( ctx.rev() )
+        # Changesets that are not found are not cached since they may be pushed later.
+        _revision_label_cache.put( cache_key, ( rev, label ) )
     else:
         rev = '-1'
         if include_hash:
@@ -4,6 +4,9 @@ from tool_shed.util import common_util, hg_util, shed_util_common as suc
 
 log = logging.getLogger( __name__ )
 
+# Keep IN clauses below the limit some databases (e.g., Oracle) place on the number of items.
+MAX_IN_CLAUSE_ITEMS = 999
+
 
 def get_latest_changeset_revision( app, repository, repo ):
     repository_tip = repository.tip( app )
@@ -18,10 +21,8 @@ def get_latest_changeset_revision( app, repository, repo ):
     return hg_util.INITIAL_CHANGELOG_HASH
 
 
-def get_latest_repository_metadata( app, decoded_repository_id, downloadable=False ):
+def get_latest_repository_metadata( app, repository, downloadable=False ):
     """Get last metadata defined for a specified repository from the database."""
-    sa_session = app.model.context.current
-    repository = sa_session.query( app.model.Repository ).get( decoded_repository_id )
     repo = hg_util.get_repo_for_repository( app, repository=repository, repo_path=None, create=False )
     if downloadable:
         changeset_revision = suc.get_latest_downloadable_changeset_revision( app, repository, repo )
@@ -93,6 +94,23 @@ def get_repository_metadata_by_id( app, id ):
     return sa_session.query( app.model.RepositoryMetadata ).get( app.security.decode_id( id ) )
 
 
+def get_repository_metadata_by_ids( app, ids ):
+    """
+    Get repository metadata for a list of encoded ids from the database using a single IN query
+    per batch of ids rather than one query per id.  The returned dictionary is keyed by the received
+    encoded ids, with a value of None for each id that has no record.
+    """
+    sa_session = app.model.context.current
+    decoded_ids = [ app.security.decode_id( id ) for id in ids ]
+    repository_metadata_by_decoded_id = {}
+    for index in range( 0, len( decoded_ids ), MAX_IN_CLAUSE_ITEMS ):
+        batch_of_ids = decoded_ids[ index:index + MAX_IN_CLAUSE_ITEMS ]
+        for repository_metadata in sa_session.query( app.model.RepositoryMetadata ) \
+                                             .filter( app.model.RepositoryMetadata.table.c.id.in_( batch_of_ids ) ):
+            repository_metadata_by_decoded_id[ repository_metadata.id ] = repository_metadata
+    return dict( ( id, repository_metadata_by_decoded_id.get( decoded_id ) ) for id, decoded_id in zip( ids, decoded_ids ) )
+
+
 def get_repository_metadata_by_repository_id_changeset_revision( app, id, changeset_revision, metadata_only=False ):
     """Get a specified metadata record for a specified repository in the tool shed."""
     if metadata_only:
@@ -105,19 +123,16 @@ def get_repository_metadata_by_repository_id_changeset_revision( app, id, change
 
 def get_repository_metadata_revisions_for_review( repository, reviewed=True ):
     repository_metadata_revisions = []
-    metadata_changeset_revision_hashes = []
     if reviewed:
-        for metadata_revision in repository.metadata_revisions:
-            metadata_changeset_revision_hashes.append( metadata_revision.changeset_revision )
+        metadata_changeset_revision_hashes = set( metadata_revision.changeset_revision
+                                                  for metadata_revision in repository.metadata_revisions )
+        rmcr_hashes = set()
         for review in repository.reviews:
-            if review.changeset_revision in metadata_changeset_revision_hashes:
-                rmcr_hashes = [ rmr.changeset_revision for rmr in repository_metadata_revisions ]
-                if review.changeset_revision not in rmcr_hashes:
-                    repository_metadata_revisions.append( review.repository_metadata )
+            if review.changeset_revision in metadata_changeset_revision_hashes and review.changeset_revision not in rmcr_hashes:
+                rmcr_hashes.add( review.changeset_revision )
+                repository_metadata_revisions.append( review.repository_metadata )
     else:
-        for review in repository.reviews:
-            if review.changeset_revision not in metadata_changeset_revision_hashes:
-                metadata_changeset_revision_hashes.append( review.changeset_revision )
+        metadata_changeset_revision_hashes = set( review.changeset_revision for review in repository.reviews )
         for metadata_revision in repository.metadata_revisions:
             if metadata_revision.changeset_revision not in metadata_changeset_revision_hashes:
                 repository_metadata_revisions.append( metadata_revision )
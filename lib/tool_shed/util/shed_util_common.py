@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import re
@@ -9,6 +8,7 @@ from urllib2 import HTTPError
 
 import sqlalchemy.orm.exc
 from sqlalchemy import and_, false, or_, true
+from sqlalchemy.orm import contains_eager, joinedload
 
 from galaxy import util
 from galaxy.web import url_for
@@ -80,6 +80,11 @@ This message was sent from the Galaxy Tool Shed instance hosted on the server
 '${host}'
 """
 
+# Parse the alert and contact templates once at import time rather than on every message sent.
+NEW_REPO_EMAIL_ALERT_TEMPLATE = string.Template( new_repo_email_alert_template )
+EMAIL_ALERT_TEMPLATE = string.Template( email_alert_template )
+CONTACT_OWNER_TEMPLATE = string.Template( contact_owner_template )
+
 
 def can_eliminate_repository_dependency(metadata_dict, tool_shed_url, name, owner):
     """
@@ -255,10 +260,11 @@ def get_absolute_path_to_file_in_repository( repo_files_dir, file_name ):
     stripped_file_name = basic_util.strip_path( file_name )
     file_path = None
     for root, dirs, files in os.walk( repo_files_dir ):
-        if root.find( '.hg' ) < 0:
-            for name in files:
-                if name == stripped_file_name:
-                    return os.path.abspath( os.path.join( root, name ) )
+        if '.hg' in dirs:
+            dirs.remove( '.hg' )
+        for name in files:
+            if name == stripped_file_name:
+                return os.path.abspath( os.path.join( root, name ) )
     return file_path
 
 
@@ -517,14 +523,14 @@ def get_repository_by_name_and_owner( app, name, owner ):
             .filter( and_( app.install_model.ToolShedRepository.table.c.name == name,
                            app.install_model.ToolShedRepository.table.c.owner == owner ) ) \
             .first()
-    # We're in the tool shed.
-    user = get_user_by_username( app, owner )
-    if user:
-        return repository_query \
-            .filter( and_( app.model.Repository.table.c.name == name,
-                           app.model.Repository.table.c.user_id == user.id ) ) \
-            .first()
-    return None
+    # We're in the tool shed.  Resolve the owner in the same query and load the
+    # repository's user along with it, since callers generally need the username.
+    return repository_query \
+        .join( app.model.Repository.user ) \
+        .options( contains_eager( app.model.Repository.user ) ) \
+        .filter( and_( app.model.Repository.table.c.name == name,
+                       app.model.User.table.c.username == owner ) ) \
+        .first()
 
 
 def get_repository_dependency_types( repository_dependencies ):
@@ -617,15 +623,22 @@ def get_repository_file_contents( app, file_path, repository_id, is_admin=False
     elif checkers.check_binary( file_path ):
         return '<br/>Binary file<br/>'
     else:
-        for i, line in enumerate( open( file_path ) ):
-            safe_str = '%s%s' % ( safe_str, basic_util.to_html_string( line ) )
-            # Stop reading after string is larger than MAX_CONTENT_SIZE.
-            if len( safe_str ) > MAX_CONTENT_SIZE:
-                large_str = \
-                    '<br/>File contents truncated because file size is larger than maximum viewing size of %s<br/>' % \
-                    util.nice_size( MAX_CONTENT_SIZE )
-                safe_str = '%s%s' % ( safe_str, large_str )
-                break
+        # Collect the translated lines and join them once rather than rebuilding the string for every line.
+        safe_lines = []
+        safe_str_size = 0
+        with open( file_path ) as fh:
+            for line in fh:
+                safe_line = basic_util.to_html_string( line )
+                safe_lines.append( safe_line )
+                safe_str_size += len( safe_line )
+                # Stop reading after string is larger than MAX_CONTENT_SIZE.
+                if safe_str_size > MAX_CONTENT_SIZE:
+                    large_str = \
+                        '<br/>File contents truncated because file size is larger than maximum viewing size of %s<br/>' % \
+                        util.nice_size( MAX_CONTENT_SIZE )
+                    safe_lines.append( large_str )
+                    break
+        safe_str = ''.join( safe_lines )
 
         if len( safe_str ) > basic_util.MAX_DISPLAY_SIZE:
             # Eliminate the middle of the file to display a file no larger than basic_util.MAX_DISPLAY_SIZE.
@@ -727,7 +740,9 @@ def get_repository_ids_requiring_prior_import_or_install( app, tsr_ids, reposito
 def get_repository_in_tool_shed( app, id ):
     """Get a repository on the tool shed side from the database via id."""
     sa_session = app.model.context.current
-    return sa_session.query( app.model.Repository ).get( app.security.decode_id( id ) )
+    return sa_session.query( app.model.Repository ) \
+                     .options( joinedload( 'user' ) ) \
+                     .get( app.security.decode_id( id ) )
 
 
 def get_repository_categories( app, id ):
@@ -1049,26 +1064,26 @@ def handle_email_alerts( app, host, repository, content_alert_str='', new_repo_a
         # We'll use 2 template bodies because we only want to send content
         # alerts to tool shed admin users.
         if new_repo_alert:
-            template = new_repo_email_alert_template
+            template = NEW_REPO_EMAIL_ALERT_TEMPLATE
         else:
-            template = email_alert_template
+            template = EMAIL_ALERT_TEMPLATE
         display_date = hg_util.get_readable_ctx_date( ctx )
-        admin_body = string.Template( template ).safe_substitute( host=host,
-                                                                  sharable_link=sharable_link,
-                                                                  repository_name=repository.name,
-                                                                  revision='%s:%s' % ( str( ctx.rev() ), ctx ),
-                                                                  display_date=display_date,
-                                                                  description=ctx.description(),
-                                                                  username=username,
-                                                                  content_alert_str=content_alert_str )
-        body = string.Template( template ).safe_substitute( host=host,
-                                                            sharable_link=sharable_link,
-                                                            repository_name=repository.name,
-                                                            revision='%s:%s' % ( str( ctx.rev() ), ctx ),
-                                                            display_date=display_date,
-                                                            description=ctx.description(),
-                                                            username=username,
-                                                            content_alert_str='' )
+        admin_body = template.safe_substitute( host=host,
+                                               sharable_link=sharable_link,
+                                               repository_name=repository.name,
+                                               revision='%s:%s' % ( str( ctx.rev() ), ctx ),
+                                               display_date=display_date,
+                                               description=ctx.description(),
+                                               username=username,
+                                               content_alert_str=content_alert_str )
+        body = template.safe_substitute( host=host,
+                                         sharable_link=sharable_link,
+                                         repository_name=repository.name,
+                                         revision='%s:%s' % ( str( ctx.rev() ), ctx ),
+                                         display_date=display_date,
+                                         description=ctx.description(),
+                                         username=username,
+                                         content_alert_str='' )
         admin_users = app.config.get( "admin_users", "" ).split( "," )
         frm = email_from
         if new_repo_alert:
@@ -1085,17 +1100,19 @@ def handle_email_alerts( app, host, repository, content_alert_str='', new_repo_a
                     email_alerts.append( user.email )
         else:
             subject = "Galaxy tool shed update alert for repository named %s" % str( repository.name )
-            email_alerts = json.loads( repository.email_alerts )
+            email_alerts = repository.get_email_alerts()
+        messages = []
         for email in email_alerts:
             to = email.strip()
-            # Send it
-            try:
-                if to in admin_users:
-                    util.send_mail( frm, to, subject, admin_body, app.config )
-                else:
-                    util.send_mail( frm, to, subject, body, app.config )
-            except Exception:
-                log.exception( "An error occurred sending a tool shed repository update alert by email." )
+            if to in admin_users:
+                messages.append( ( to, admin_body ) )
+            else:
+                messages.append( ( to, body ) )
+        # Send all of the alerts over a single connection to the mail server.
+        try:
+            util.send_mail_bulk( frm, messages, subject, app.config )
+        except Exception:
+            log.exception( "An error occurred sending a tool shed repository update alert by email." )
 
 
 def have_shed_tool_conf_for_install( app ):
@@ -1,5 +1,6 @@
 import logging
 import os
+import re
 import shutil
 
 import galaxy.tools
@@ -12,6 +13,12 @@ from tool_shed.util import basic_util
 
 log = logging.getLogger( __name__ )
 
+# Extracts the path of the missing file from an IOError message like:
+# [Errno 2] No such file or directory: '/path/to/file.loc'
+# or, when the path is unicode, like:
+# [Errno 2] No such file or directory: u'/path/to/file.loc'
+MISSING_FILE_RE = re.compile( r"No such file or directory:\s*u?'([^']+)'" )
+
 
 def build_shed_tool_conf_select_field( app ):
     """Build a SelectField whose options are the keys in app.toolbox.shed_tool_confs."""
@@ -104,10 +111,9 @@ def generate_message_for_invalid_tools( app, invalid_file_tups, repository, meta
             message += "installed into a local Galaxy instance.  Correct the following problems and reset metadata.%s" % new_line
     for itc_tup in invalid_file_tups:
         tool_file, exception_msg = itc_tup
-        if exception_msg.find( 'No such file or directory' ) >= 0:
-            exception_items = exception_msg.split()
-            missing_file_items = exception_items[ 7 ].split( '/' )
-            missing_file = missing_file_items[ -1 ].rstrip( '\'' )
+        missing_file_match = MISSING_FILE_RE.search( exception_msg )
+        if missing_file_match:
+            missing_file = os.path.basename( missing_file_match.group( 1 ) )
             if missing_file.endswith( '.loc' ):
                 sample_ext = '%s.sample' % missing_file
             else:
@@ -0,0 +1,128 @@
+import logging
+import SocketServer
+import threading
+from contextlib import contextmanager
+
+from galaxy import util
+from galaxy.util.bunch import Bunch
+
+FROM = 'galaxy-no-reply@localhost'
+SUBJECT = 'Galaxy tool shed update alert'
+
+
+def test_send_mail_bulk_single_connection():
+    messages = [ ( 'a@localhost', 'admin body' ), ( 'b@localhost', 'body' ), ( 'c@localhost', 'body' ) ]
+    with __smtp_server() as server:
+        util.send_mail_bulk( FROM, messages, SUBJECT, __config( server ) )
+    assert server.connections == 1
+    assert [ ( to, __body( data ) ) for to, data in server.received ] == [ ( [ to ], body ) for to, body in messages ]
+
+
+def test_send_mail_bulk_reconnects_once():
+    messages = [ ( 'a@localhost', 'admin body' ), ( 'b@localhost', 'body' ), ( 'c@localhost', 'body' ) ]
+    # Drop the connection when the second message is sent.
+    with __smtp_server( drop_at=[ 1 ] ) as server:
+        util.send_mail_bulk( FROM, messages, SUBJECT, __config( server ) )
+    assert server.connections == 2
+    assert [ to for to, data in server.received ] == [ [ 'a@localhost' ], [ 'b@localhost' ], [ 'c@localhost' ] ]
+
+
+def test_send_mail_bulk_logs_undelivered():
+    messages = [ ( 'a@localhost', 'body' ), ( 'b@localhost', 'body' ), ( 'c@localhost', 'body' ) ]
+    # Drop the connection when the second message is sent, and again when it is retried.
+    with __smtp_server( drop_at=[ 1, 2 ] ) as server, __captured_log() as records:
+        util.send_mail_bulk( FROM, messages, SUBJECT, __config( server ) )
+    assert [ to for to, data in server.received ] == [ [ 'a@localhost' ] ]
+    assert any( 'b@localhost, c@localhost' in record.getMessage() for record in records )
+
+
+def test_send_mail_bulk_without_recipients():
+    with __smtp_server() as server:
+        util.send_mail_bulk( FROM, [], SUBJECT, __config( server ) )
+    assert server.connections == 0
+
+
+class SMTPHandler( SocketServer.StreamRequestHandler ):
+    """Speaks just enough SMTP for smtplib to send mail without extensions."""
+
+    def handle( self ):
+        server = self.server
+        server.connections += 1
+        self.reply( '220 localhost test server' )
+        to = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.strip().split( ' ', 1 )[ 0 ].upper()
+            if command == 'EHLO':
+                self.reply( '502 Command not implemented' )
+            elif command == 'MAIL':
+                to = []
+                self.reply( '250 OK' )
+            elif command == 'RCPT':
+                to.append( line.split( ':', 1 )[ 1 ].strip().strip( '<>' ) )
+                self.reply( '250 OK' )
+            elif command == 'DATA':
+                data_command = server.data_commands
+                server.data_commands += 1
+                if data_command in server.drop_at:
+                    return
+                self.reply( '354 End data with <CR><LF>.<CR><LF>' )
+                data = []
+                for data_line in iter( self.rfile.readline, '' ):
+                    if data_line.rstrip( '\r\n' ) == '.':
+                        break
+                    data.append( data_line )
+                server.received.append( ( to, ''.join( data ) ) )
+                self.reply( '250 OK' )
+            elif command == 'QUIT':
+                self.reply( '221 Bye' )
+                return
+            else:
+                # HELO, RSET and NOOP
+                self.reply( '250 OK' )
+
+    def reply( self, line ):
+        self.wfile.write( '%s\r\n' % line )
+        self.wfile.flush()
+
+
+@contextmanager
+def __smtp_server( drop_at=[] ):
+    server = SocketServer.TCPServer( ( '127.0.0.1', 0 ), SMTPHandler )
+    server.connections = 0
+    server.data_commands = 0
+    server.drop_at = drop_at
+    server.received = []
+    thread = threading.Thread( target=server.serve_forever )
+    thread.daemon = True
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def __captured_log():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    util.log.addHandler( handler )
+    try:
+        yield records
+    finally:
+        util.log.removeHandler( handler )
+
+
+def __config( server ):
+    return Bunch( smtp_server='%s:%d' % server.server_address,
+                  smtp_ssl=False,
+                  smtp_username=None,
+                  smtp_password=None )
+
+
+def __body( data ):
+    return data.split( '\r\n\r\n', 1 )[ 1 ].strip()
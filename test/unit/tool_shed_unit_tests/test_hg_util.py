@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from mercurial import commands, hg
+
+from galaxy.util.bunch import Bunch
+from tool_shed.util import hg_util
+
+
+def test_get_changectx_for_changeset():
+    # With more changesets than hex digits, at least two hashes share their first character.
+    with __test_repo( 17 ) as repo:
+        ctx = repo[ 'tip' ]
+        changeset_revision = str( ctx )
+        # Short hashes, including unicode ones received in requests, resolve to their changeset.
+        assert hg_util.get_changectx_for_changeset( repo, changeset_revision ).node() == ctx.node()
+        assert hg_util.get_changectx_for_changeset( repo, unicode( changeset_revision ) ).node() == ctx.node()
+        first_ctx = repo[ 0 ]
+        assert hg_util.get_changectx_for_changeset( repo, str( first_ctx ) ).node() == first_ctx.node()
+        # Anything else is not resolved.
+        assert hg_util.get_changectx_for_changeset( repo, ctx.hex() ) is None
+        assert hg_util.get_changectx_for_changeset( repo, 'tip' ) is None
+        assert hg_util.get_changectx_for_changeset( repo, '0' ) is None
+        assert hg_util.get_changectx_for_changeset( repo, 'null' ) is None
+        assert hg_util.get_changectx_for_changeset( repo, hg_util.INITIAL_CHANGELOG_HASH ) is None
+        assert hg_util.get_changectx_for_changeset( repo, 'abcdef012345' ) is None
+        assert hg_util.get_changectx_for_changeset( repo, u'\xe9' * 12 ) is None
+        assert hg_util.get_changectx_for_changeset( repo, '' ) is None
+        assert hg_util.get_changectx_for_changeset( repo, None ) is None
+        # A prefix shared by several changesets is ambiguous.
+        hashes = [ repo[ rev ].hex() for rev in repo ]
+        prefix = __shared_prefix( hashes )
+        assert prefix is not None
+        assert hg_util.get_changectx_for_changeset( repo, prefix ) is None
+
+
+
+def test_get_cached_repo():
+    with __test_repo() as repo:
+        cached_repo = hg_util.get_cached_repo( repo.root )
+        # The repository opened by the first call is reused while it is unchanged on disk.
+        assert hg_util.get_cached_repo( repo.root ) is cached_repo
+        # A changeset committed through another repository object is seen by the next call.
+        __commit( repo, 'new_file.txt' )
+        reloaded_repo = hg_util.get_cached_repo( repo.root )
+        assert reloaded_repo is not cached_repo
+        assert reloaded_repo[ 'tip' ].node() == repo[ 'tip' ].node()
+        assert hg_util.get_cached_repo( repo.root ) is reloaded_repo
+
+
+def test_get_cached_repo_without_cachedlocalrepo():
+    cachedlocalrepo = hg_util._cachedlocalrepo
+    # Mercurial releases older than 3.6 do not provide hg.cachedlocalrepo.
+    hg_util._cachedlocalrepo = None
+    try:
+        with __test_repo() as repo:
+            first_repo = hg_util.get_cached_repo( repo.root )
+            second_repo = hg_util.get_cached_repo( repo.root )
+            assert first_repo is not second_repo
+            assert first_repo[ 'tip' ].node() == second_repo[ 'tip' ].node() == repo[ 'tip' ].node()
+    finally:
+        hg_util._cachedlocalrepo = cachedlocalrepo
+
+
+
+def test_get_rev_label_changeset_revision_from_repository_metadata():
+    with __test_repo( 2 ) as repo:
+        changeset_revision = str( repo[ 1 ] )
+        repository_metadata = Bunch( changeset_revision=changeset_revision )
+        rev, label, returned_changeset_revision = \
+            hg_util.get_rev_label_changeset_revision_from_repository_metadata( None,
+                                                                               repository_metadata,
+                                                                               include_date=False,
+                                                                               repo=repo )
+        assert ( rev, label, returned_changeset_revision ) == ( '0001', '1:%s' % changeset_revision, changeset_revision )
+        # Labels of changesets that are found are cached for each combination of label options.
+        assert hg_util._revision_label_cache.get( ( repo.root, changeset_revision, False, True ) ) == ( rev, label )
+        assert hg_util._revision_label_cache.get( ( repo.root, changeset_revision, True, True ) ) is None
+        assert hg_util.get_rev_label_changeset_revision_from_repository_metadata( None,
+                                                                                  repository_metadata,
+                                                                                  include_date=False,
+                                                                                  repo=repo ) == ( rev, label, changeset_revision )
+        # Changesets that are not found are not cached since they may be pushed later.
+        unknown_changeset_revision = 'abcdef012345'
+        repository_metadata = Bunch( changeset_revision=unknown_changeset_revision )
+        assert hg_util.get_rev_label_changeset_revision_from_repository_metadata( None,
+                                                                                  repository_metadata,
+                                                                                  include_date=False,
+                                                                                  repo=repo ) == \
+            ( '-1', '-1:%s' % unknown_changeset_revision, unknown_changeset_revision )
+        assert hg_util._revision_label_cache.get( ( repo.root, unknown_changeset_revision, False, True ) ) is None
+
+
+def __shared_prefix( hashes ):
+    seen = set()
+    for changeset_hash in hashes:
+        prefix = changeset_hash[ :1 ]
+        if prefix in seen:
+            return prefix
+        seen.add( prefix )
+    return None
+
+
+@contextmanager
+def __test_repo( num_changesets=1 ):
+    repo_path = tempfile.mkdtemp()
+    try:
+        repo = hg.repository( hg_util.get_configured_ui(), repo_path, create=True )
+        for i in range( num_changesets ):
+            __commit( repo, 'file_%d.txt' % i )
+        yield repo
+    finally:
+        shutil.rmtree( repo_path )
+
+
+def __commit( repo, filename, contents='test' ):
+    with open( os.path.join( repo.root, filename ), 'w' ) as f:
+        f.write( contents )
+    commands.commit( repo.ui, repo, addremove=True, message='Add %s' % filename, user='test' )